@@ -7,6 +7,58 @@ import pandas as pd
 import numpy as np
 from datetime import timedelta
 from collections import defaultdict
+from transaction_columns import to_columns, to_timestamp, to_timestamps, compile_keywords, contains
+
+FEE_KEYWORDS = ['late payment', 'late fee', 'overdraft', 'nsf',
+                'insufficient funds', 'returned payment']
+PAYDAY_KEYWORDS = ['cash advance', 'payday', 'quickcash', 'fastcash',
+                   'advance america', 'check into cash']
+
+
+def _scan_window(dates_ns, amounts, window_ns, min_count):
+    """
+    Find the first window of `window_ns` holding at least `min_count` entries.
+    
+    Args:
+        dates_ns: sorted int64 timestamps (nanoseconds)
+        amounts: float64 amounts aligned with dates_ns
+        window_ns: window length in nanoseconds (inclusive)
+        min_count: minimum number of entries in the window
+        
+    Returns:
+        Tuple of (start index, count, total, average), or None if no window qualifies
+    """
+    # Windows look forward and include both endpoints ([t, t + window]), so
+    # pandas' time-based rolling (backward-looking, (t - window, t]) would
+    # report a different start date. End index of the window starting at
+    # every entry is found in one sweep instead.
+    window_end_idx = np.searchsorted(dates_ns, dates_ns + window_ns, side='right')
+    counts = window_end_idx - np.arange(len(dates_ns))
+    qualifying = counts >= min_count
+    if not qualifying.any():
+        return None
+    
+    i = int(np.argmax(qualifying))
+    window_amounts = amounts[i:window_end_idx[i]]
+    total = window_amounts.sum()
+    return i, int(counts[i]), total, total / len(window_amounts)
+
+
+def materialize_fee_list(fee_list_arrays):
+    """
+    Build per-fee records from a late_payment_fees indicator's arrays.
+    
+    Args:
+        fee_list_arrays: (dates, descriptions, amounts) from the indicator details
+        
+    Returns:
+        List of dicts with 'date', 'description' and 'amount' keys
+    """
+    dates, descriptions, amounts = fee_list_arrays
+    return [
+        {'date': pd.Timestamp(date), 'description': description, 'amount': amount}
+        for date, description, amount in zip(dates, descriptions, amounts.tolist())
+    ]
 
 
 class FinancialStressDetector:
@@ -23,6 +75,9 @@ class FinancialStressDetector:
         self.thresholds = self._set_thresholds(sensitivity)
         self.stress_indicators = []
         
+        self._fee_re = compile_keywords(FEE_KEYWORDS)
+        self._payday_re = compile_keywords(PAYDAY_KEYWORDS)
+        
     def _set_thresholds(self, sensitivity):
         """Set detection thresholds based on sensitivity."""
         base = {
@@ -43,167 +98,161 @@ class FinancialStressDetector:
             
         return base
     
-    def detect_late_payment_fees(self, df):
+    def detect_late_payment_fees(self, cols):
         """Detect late payment and overdraft fees."""
-        indicators = []
-        
         # Look for fee transactions
-        fee_keywords = ['late payment', 'late fee', 'overdraft', 'nsf', 
-                       'insufficient funds', 'returned payment']
+        fee_mask = (cols.type == 'fee') | contains(cols.desc_lower, self._fee_re)
+        if not fee_mask.any():
+            return []
         
-        fee_txns = df[
-            (df['type'] == 'fee') |
-            df['description'].str.lower().str.contains('|'.join(fee_keywords), na=False)
-        ]
+        fee_idx = np.flatnonzero(fee_mask)
+        num_fees = len(fee_idx)
+        fee_dates = cols.date[fee_idx]
+        fee_amounts = cols.amount[fee_idx]
+        total_fees = abs(fee_amounts.sum())
         
-        if len(fee_txns) > 0:
-            total_fees = abs(fee_txns['amount'].sum())
-            
-            # Group fees by type
-            overdraft_fees = fee_txns[
-                fee_txns['description'].str.contains('overdraft', case=False, na=False)
-            ]
-            late_payment_fees = fee_txns[
-                fee_txns['description'].str.contains('late', case=False, na=False)
-            ]
-            
-            severity = 'low'
-            if total_fees > self.thresholds['high_fee_threshold']:
-                severity = 'medium'
-            if len(fee_txns) >= 3:
-                severity = 'high'
-            
-            indicators.append({
-                'indicator_type': 'late_payment_fees',
-                'severity': severity,
-                'date_range': (fee_txns['date'].min(), fee_txns['date'].max()),
-                'details': {
-                    'total_fees': round(total_fees, 2),
-                    'num_fees': len(fee_txns),
-                    'overdraft_fees': len(overdraft_fees),
-                    'late_payment_fees': len(late_payment_fees),
-                    'fee_list': fee_txns[['date', 'description', 'amount']].to_dict('records')
-                },
-                'message': f'  {len(fee_txns)} late payment/overdraft fee(s) detected (${total_fees:.2f} total)',
-                'recommendation': 'Consider setting up automatic payments to avoid late fees.'
-            })
+        # Group fees by type in a single pass: bit 0 = overdraft, bit 1 = late
+        descriptions = cols.desc_lower.iloc[fee_idx]
+        fee_codes = (
+            contains(descriptions, 'overdraft').astype(np.int64) |
+            (contains(descriptions, 'late').astype(np.int64) << 1)
+        )
+        code_counts = np.bincount(fee_codes, minlength=4)
+        num_overdraft_fees = int(code_counts[1] + code_counts[3])
+        num_late_payment_fees = int(code_counts[2] + code_counts[3])
         
-        return indicators
+        severity = 'low'
+        if total_fees > self.thresholds['high_fee_threshold']:
+            severity = 'medium'
+        if num_fees >= 3:
+            severity = 'high'
+        
+        return [{
+            'indicator_type': 'late_payment_fees',
+            'severity': severity,
+            'date_range': (to_timestamp(cols, fee_dates.min()), to_timestamp(cols, fee_dates.max())),
+            'details': {
+                'total_fees': round(total_fees, 2),
+                'num_fees': num_fees,
+                'overdraft_fees': num_overdraft_fees,
+                'late_payment_fees': num_late_payment_fees,
+                # Raw (dates, descriptions, amounts); see materialize_fee_list
+                'fee_list_arrays': (to_timestamps(cols, fee_dates), cols.description[fee_idx], fee_amounts)
+            },
+            'message': f'  {num_fees} late payment/overdraft fee(s) detected (${total_fees:.2f} total)',
+            'recommendation': 'Consider setting up automatic payments to avoid late fees.'
+        }]
     
-    def detect_frequent_small_withdrawals(self, df):
+    def detect_frequent_small_withdrawals(self, cols):
         """Detect patterns of frequent small ATM withdrawals (cash flow issues)."""
-        indicators = []
+        # Look for small ATM withdrawals
+        small_mask = ((cols.type == 'withdrawal') | contains(cols.desc_lower, 'atm')) & (
+            cols.amount_abs < self.thresholds['small_withdrawal_threshold']
+        )
+        if not small_mask.any():
+            return []
         
-        # Look for ATM withdrawals
-        atm_txns = df[
-            (df['type'] == 'withdrawal') |
-            df['description'].str.contains('ATM', case=False, na=False)
-        ].copy()
-        
-        if len(atm_txns) > 0:
-            # Focus on small withdrawals
-            small_withdrawals = atm_txns[
-                abs(atm_txns['amount']) < self.thresholds['small_withdrawal_threshold']
-            ]
-            
-            if len(small_withdrawals) > 0:
-                # Look for clusters
-                small_withdrawals = small_withdrawals.sort_values('date')
-                
-                # Check for frequent withdrawals in short time periods
-                for i in range(len(small_withdrawals)):
-                    window_start = small_withdrawals.iloc[i]['date']
-                    window_end = window_start + timedelta(days=self.thresholds['small_withdrawal_days'])
-                    
-                    window_txns = small_withdrawals[
-                        (small_withdrawals['date'] >= window_start) &
-                        (small_withdrawals['date'] <= window_end)
-                    ]
-                    
-                    if len(window_txns) >= self.thresholds['small_withdrawal_count']:
-                        total_withdrawn = abs(window_txns['amount'].sum())
-                        avg_withdrawal = abs(window_txns['amount'].mean())
-                        
-                        severity = 'medium'
-                        if len(window_txns) >= 10:
-                            severity = 'high'
-                        
-                        indicators.append({
-                            'indicator_type': 'frequent_small_withdrawals',
-                            'severity': severity,
-                            'date_range': (window_start, window_end),
-                            'details': {
-                                'num_withdrawals': len(window_txns),
-                                'total_amount': round(total_withdrawn, 2),
-                                'avg_withdrawal': round(avg_withdrawal, 2),
-                                'days': self.thresholds['small_withdrawal_days']
-                            },
-                            'message': f' {len(window_txns)} small ATM withdrawals in {self.thresholds["small_withdrawal_days"]} days (potential cash flow issue)',
-                            'recommendation': 'Multiple small withdrawals may indicate cash flow difficulties. Consider reviewing your budget.'
-                        })
-                        break  # Only report the first cluster
+        # Look for clusters
+        small_idx = np.flatnonzero(small_mask)
+        small_idx = small_idx[np.argsort(cols.date[small_idx])]
+        dates = cols.date[small_idx]
+        window = np.timedelta64(self.thresholds['small_withdrawal_days'], 'D')
         
-        return indicators
-    
-    def detect_payday_loans(self, df):
-        """Detect potential payday loans or cash advances."""
-        indicators = []
+        # Only report the first cluster
+        cluster = _scan_window(
+            dates.view(np.int64),
+            cols.amount[small_idx],
+            window.astype('timedelta64[ns]').view(np.int64),
+            self.thresholds['small_withdrawal_count']
+        )
+        if cluster is None:
+            return []
         
-        payday_keywords = ['cash advance', 'payday', 'quickcash', 'fastcash', 
-                          'advance america', 'check into cash']
+        i, num_withdrawals, total, avg = cluster
+        window_start = to_timestamp(cols, dates[i])
+        window_end = window_start + timedelta(days=self.thresholds['small_withdrawal_days'])
+        total_withdrawn = abs(total)
+        avg_withdrawal = abs(avg)
         
-        loan_txns = df[
-            df['description'].str.lower().str.contains('|'.join(payday_keywords), na=False) |
-            (df['category'] == 'Loan')
-        ]
+        severity = 'medium'
+        if num_withdrawals >= 10:
+            severity = 'high'
         
-        if len(loan_txns) > 0:
-            for _, txn in loan_txns.iterrows():
-                indicators.append({
-                    'indicator_type': 'payday_loan',
-                    'severity': 'high',
-                    'date_range': (txn['date'], txn['date']),
-                    'details': {
-                        'merchant': txn['merchant'],
-                        'amount': txn['amount'],
-                        'date': txn['date']
-                    },
-                    'message': f' Potential payday loan detected: ${abs(txn["amount"]):.2f}',
-                    'recommendation': 'Payday loans often have very high interest rates. Explore alternatives like credit union loans or payment plans.'
-                })
+        return [{
+            'indicator_type': 'frequent_small_withdrawals',
+            'severity': severity,
+            'date_range': (window_start, window_end),
+            'details': {
+                'num_withdrawals': num_withdrawals,
+                'total_amount': round(total_withdrawn, 2),
+                'avg_withdrawal': round(avg_withdrawal, 2),
+                'days': self.thresholds['small_withdrawal_days']
+            },
+            'message': f' {num_withdrawals} small ATM withdrawals in {self.thresholds["small_withdrawal_days"]} days (potential cash flow issue)',
+            'recommendation': 'Multiple small withdrawals may indicate cash flow difficulties. Consider reviewing your budget.'
+        }]
+    
+    def detect_payday_loans(self, cols):
+        """Detect potential payday loans or cash advances."""
+        loan_mask = contains(cols.desc_lower, self._payday_re) | (cols.category == 'Loan')
+        if not loan_mask.any():
+            return []
         
-        return indicators
+        loan_idx = np.flatnonzero(loan_mask)
+        return [
+            {
+                'indicator_type': 'payday_loan',
+                'severity': 'high',
+                'date_range': (date, date),
+                'details': {
+                    'merchant': merchant,
+                    'amount': amount,
+                    'date': date
+                },
+                'message': f' Potential payday loan detected: ${abs(amount):.2f}',
+                'recommendation': 'Payday loans often have very high interest rates. Explore alternatives like credit union loans or payment plans.'
+            }
+            for merchant, amount, date in zip(
+                cols.merchant[loan_idx],
+                cols.amount[loan_idx],
+                to_timestamps(cols, cols.date[loan_idx])
+            )
+        ]
     
-    def calculate_running_balance(self, df):
-        """Calculate running balance from transactions."""
-        df_sorted = df.sort_values('date').copy()
-        df_sorted['balance'] = df_sorted['amount'].cumsum()
+    def calculate_running_balance(self, cols):
+        """
+        Calculate running balance from transactions.
+        
+        Returns:
+            Tuple of (dates, balances) arrays sorted by date
+        """
+        order = np.argsort(cols.date)
+        balance = np.empty_like(cols.amount)
+        np.cumsum(cols.amount[order], out=balance)
         # Assume starting balance of $5000 for demo
-        df_sorted['balance'] += 5000
-        return df_sorted
+        balance += 5000
+        return cols.date[order], balance
     
-    def detect_declining_balance(self, df):
+    def detect_declining_balance(self, cols):
         """Detect declining account balance trends."""
         indicators = []
         
         # Calculate running balance
-        df_with_balance = self.calculate_running_balance(df)
+        dates, balance = self.calculate_running_balance(cols)
         
         # Check balance trend over time
-        if len(df_with_balance) > 30:
+        if len(dates) > 30:
             # Compare first month vs last month average
-            days_total = (df_with_balance['date'].max() - df_with_balance['date'].min()).days
+            first_date = pd.Timestamp(dates[0])
+            last_date = pd.Timestamp(dates[-1])
+            days_total = (last_date - first_date).days
             
             if days_total >= 60:
-                mid_point = df_with_balance['date'].min() + timedelta(days=days_total//2)
-                
-                early_balance = df_with_balance[
-                    df_with_balance['date'] <= mid_point
-                ]['balance'].mean()
+                mid_point = first_date + timedelta(days=days_total//2)
+                split = np.searchsorted(dates, np.datetime64(mid_point), side='right')
                 
-                late_balance = df_with_balance[
-                    df_with_balance['date'] > mid_point
-                ]['balance'].mean()
+                early_balance = balance[:split].mean()
+                late_balance = balance[split:].mean()
                 
                 if early_balance > 0:
                     decline_pct = ((early_balance - late_balance) / early_balance) * 100
@@ -218,12 +267,12 @@ class FinancialStressDetector:
                         indicators.append({
                             'indicator_type': 'declining_balance',
                             'severity': severity,
-                            'date_range': (df_with_balance['date'].min(), df_with_balance['date'].max()),
+                            'date_range': (to_timestamp(cols, dates[0]), to_timestamp(cols, dates[-1])),
                             'details': {
                                 'early_avg_balance': round(early_balance, 2),
                                 'recent_avg_balance': round(late_balance, 2),
                                 'decline_percentage': round(decline_pct, 2),
-                                'current_balance': round(df_with_balance['balance'].iloc[-1], 2)
+                                'current_balance': round(balance[-1], 2)
                             },
                             'message': f' Account balance declining by {decline_pct:.1f}% over time',
                             'recommendation': 'Your account balance is declining. Review your spending and consider ways to increase income or reduce expenses.'
@@ -236,21 +285,22 @@ class FinancialStressDetector:
         Analyze transactions for financial stress indicators.
         
         Args:
-            transactions_df: DataFrame with transaction data
+            transactions_df: DataFrame with transaction data, or TransactionColumns
+                from to_columns() to share one conversion between detectors
             
         Returns:
             List of stress indicators
         """
-        df = transactions_df.copy()
-        df['date'] = pd.to_datetime(df['date'])
+        # Pull every column out once; detectors work on the NumPy arrays
+        cols = to_columns(transactions_df)
         
         all_indicators = []
         
         # Run all detectors
-        all_indicators.extend(self.detect_late_payment_fees(df))
-        all_indicators.extend(self.detect_frequent_small_withdrawals(df))
-        all_indicators.extend(self.detect_payday_loans(df))
-        all_indicators.extend(self.detect_declining_balance(df))
+        all_indicators.extend(self.detect_late_payment_fees(cols))
+        all_indicators.extend(self.detect_frequent_small_withdrawals(cols))
+        all_indicators.extend(self.detect_payday_loans(cols))
+        all_indicators.extend(self.detect_declining_balance(cols))
         
         # Sort by severity
         severity_order = {'high': 0, 'medium': 1, 'low': 2}
@@ -264,34 +314,30 @@ class FinancialStressDetector:
         if not self.stress_indicators:
             return "\nNo significant financial stress indicators detected. Keep up the good work!"
         
-        summary = f"\n{'='*60}\nFINANCIAL HEALTH INSIGHTS\n{'='*60}\n"
-        summary += f"We've identified {len(self.stress_indicators)} area(s) that may need attention.\n"
-        
+        parts = ["", "=" * 60, "FINANCIAL HEALTH INSIGHTS", "=" * 60]
+        parts.append(f"We've identified {len(self.stress_indicators)} area(s) that may need attention.")
         
         high_severity = [i for i in self.stress_indicators if i['severity'] == 'high']
         medium_severity = [i for i in self.stress_indicators if i['severity'] == 'medium']
         low_severity = [i for i in self.stress_indicators if i['severity'] == 'low']
         
         if high_severity:
-            summary += f"HIGH PRIORITY ({len(high_severity)} item(s)):\n"
+            parts.append(f"HIGH PRIORITY ({len(high_severity)} item(s)):")
             for indicator in high_severity:
-                summary += f"\n   {indicator['message']}\n"
-                summary += f"    {indicator['recommendation']}\n"
+                parts.extend(["", f"   {indicator['message']}", f"    {indicator['recommendation']}"])
         
         if medium_severity:
-            summary += f"\nMEDIUM PRIORITY ({len(medium_severity)} item(s)):\n"
+            parts.extend(["", f"MEDIUM PRIORITY ({len(medium_severity)} item(s)):"])
             for indicator in medium_severity:
-                summary += f"\n   {indicator['message']}\n"
-                summary += f"    {indicator['recommendation']}\n"
+                parts.extend(["", f"   {indicator['message']}", f"    {indicator['recommendation']}"])
         
         if low_severity:
-            summary += f"\nLOW PRIORITY ({len(low_severity)} item(s)):\n"
+            parts.extend(["", f"LOW PRIORITY ({len(low_severity)} item(s)):"])
             for indicator in low_severity:
-                summary += f"\n   {indicator['message']}\n"
-                summary += f"    {indicator['recommendation']}\n"
+                parts.extend(["", f"   {indicator['message']}", f"    {indicator['recommendation']}"])
         
-        summary += f"\n{'='*60}\n"
-        return summary
+        parts.extend(["", "=" * 60])
+        return "\n".join(parts) + "\n"
     
     def get_risk_score(self):
         """Calculate overall financial stress risk score (0-100)."""
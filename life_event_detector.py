@@ -4,8 +4,14 @@ Detects: job changes, relocations, travel events
 """
 
 import pandas as pd
-from datetime import timedelta
+import numpy as np
 from collections import defaultdict
+from transaction_columns import to_columns, to_timestamp, to_timestamps, compile_keywords, contains
+
+MOVING_KEYWORDS = ['mover', 'moving', 'relocation', 'truck rental', 'u-haul', 'pods']
+UTILITY_SETUP_KEYWORDS = ['setup', 'activation', 'new service', 'installation']
+TRAVEL_KEYWORDS = ['airline', 'flight', 'hotel', 'resort', 'hostel',
+                   'airbnb', 'booking.com', 'expedia', 'travel insurance']
 
 
 class LifeEventDetector:
@@ -21,23 +27,27 @@ class LifeEventDetector:
         self.sensitivity = sensitivity
         self.events = []
         
-    def detect_job_change(self, df):
+        self._moving_re = compile_keywords(MOVING_KEYWORDS)
+        self._utility_re = compile_keywords(UTILITY_SETUP_KEYWORDS)
+        self._travel_re = compile_keywords(TRAVEL_KEYWORDS)
+        
+    def detect_job_change(self, cols):
         """Detect potential job changes from income patterns."""
         events = []
         
         # Look for income sources
-        income_df = df[df['type'] == 'deposit'].copy()
-        income_df = income_df[income_df['category'] == 'Income']
+        income_mask = (cols.type == 'deposit') & (cols.category == 'Income')
+        income_dates = cols.date[income_mask]
+        income_merchants = cols.merchant[income_mask]
+        income_amounts = cols.amount[income_mask]
         
         # Group by merchant (employer)
-        employer_changes = []
-        employers = income_df['merchant'].unique()
+        employers = pd.unique(income_merchants)
         
         if len(employers) > 1:
             for i, employer in enumerate(employers):
-                employer_txns = income_df[income_df['merchant'] == employer]
-                first_payment = employer_txns['date'].min()
-                last_payment = employer_txns['date'].max()
+                employer_dates = income_dates[income_merchants == employer]
+                first_payment = to_timestamp(cols, employer_dates.min())
                 
                 if i > 0:
                     events.append({
@@ -49,7 +59,7 @@ class LifeEventDetector:
                             'previous_employer': employers[i-1],
                             'first_payment_date': first_payment,
                             'income_change': self._calculate_income_change(
-                                income_df, employers[i-1], employer
+                                income_merchants, income_amounts, employers[i-1], employer
                             )
                         },
                         'message': f'Potential job change detected: New income source from {employer}'
@@ -57,151 +67,142 @@ class LifeEventDetector:
         
         return events
     
-    def _calculate_income_change(self, income_df, old_employer, new_employer):
+    def _calculate_income_change(self, merchants, amounts, old_employer, new_employer):
         """Calculate income change between employers."""
-        old_avg = income_df[income_df['merchant'] == old_employer]['amount'].mean()
-        new_avg = income_df[income_df['merchant'] == new_employer]['amount'].mean()
+        old_avg = amounts[merchants == old_employer].mean()
+        new_avg = amounts[merchants == new_employer].mean()
         
         if old_avg and new_avg:
             change_pct = ((new_avg - old_avg) / old_avg) * 100
             return round(change_pct, 2)
         return None
     
-    def detect_relocation(self, df):
+    def detect_relocation(self, cols):
         """Detect potential relocations from transaction patterns."""
         events = []
         
         # Look for moving-related keywords
-        moving_keywords = ['mover', 'moving', 'relocation', 'truck rental', 'u-haul', 'pods']
-        utility_setup_keywords = ['setup', 'activation', 'new service', 'installation']
+        moving_mask = contains(cols.desc_lower, self._moving_re) | (cols.category == 'Moving')
+        if not moving_mask.any():
+            return events
         
-        moving_txns = df[
-            df['description'].str.lower().str.contains('|'.join(moving_keywords), na=False)
-        ]
+        # Evidence flags are computed once, in date order, as running counts
+        order = np.argsort(cols.date, kind='stable')
+        dates = cols.date[order]
+        deposit_mask = contains(cols.desc_lower, 'deposit') & (cols.amount < -1000)
+        utility_mask = contains(cols.desc_lower, self._utility_re)
+        deposit_counts = np.r_[0, np.cumsum(deposit_mask[order])]
+        utility_counts = np.r_[0, np.cumsum(utility_mask[order])]
         
-        for _, txn in moving_txns.iterrows():
-            # Look for corroborating evidence within 30 days
-            window_start = txn['date'] - timedelta(days=7)
-            window_end = txn['date'] + timedelta(days=30)
-            window_df = df[(df['date'] >= window_start) & (df['date'] <= window_end)]
-            
-            # Check for security deposits
-            security_deposits = window_df[
-                (window_df['description'].str.contains('deposit', case=False, na=False)) &
-                (window_df['amount'] < -1000)
-            ]
-            
-            # Check for utility setups
-            utility_setups = window_df[
-                window_df['description'].str.lower().str.contains('|'.join(utility_setup_keywords), na=False)
-            ]
+        # Look for corroborating evidence within 30 days of every move at once
+        move_dates = cols.date[moving_mask]
+        window_lo = np.searchsorted(dates, move_dates - np.timedelta64(7, 'D'), side='left')
+        window_hi = np.searchsorted(dates, move_dates + np.timedelta64(30, 'D'), side='right')
+        
+        for move_date, moving_charge, moving_company, lo, hi in zip(
+            to_timestamps(cols, move_dates),
+            cols.amount[moving_mask],
+            cols.merchant[moving_mask],
+            window_lo,
+            window_hi
+        ):
+            # Check for security deposits and utility setups
+            security_deposits = int(deposit_counts[hi] - deposit_counts[lo])
+            utility_setups = int(utility_counts[hi] - utility_counts[lo])
             
             confidence = 0.6
-            if len(security_deposits) > 0:
+            if security_deposits > 0:
                 confidence += 0.2
-            if len(utility_setups) > 0:
+            if utility_setups > 0:
                 confidence += 0.15
             
             events.append({
                 'event_type': 'relocation',
-                'date': txn['date'],
+                'date': move_date,
                 'confidence': min(confidence, 0.95),
                 'details': {
-                    'moving_charge': txn['amount'],
-                    'moving_company': txn['merchant'],
-                    'security_deposits_found': len(security_deposits),
-                    'utility_setups_found': len(utility_setups)
+                    'moving_charge': moving_charge,
+                    'moving_company': moving_company,
+                    'security_deposits_found': security_deposits,
+                    'utility_setups_found': utility_setups
                 },
-                'message': f'Potential relocation detected on {txn["date"].strftime("%Y-%m-%d")}'
+                'message': f'Potential relocation detected on {move_date.strftime("%Y-%m-%d")}'
             })
         
         return events
     
-    def detect_travel(self, df):
+    def detect_travel(self, cols):
         """Detect travel events from transaction patterns."""
         events = []
         
-        # Travel-related keywords
-        travel_keywords = ['airline', 'flight', 'hotel', 'resort', 'hostel', 
-                          'airbnb', 'booking.com', 'expedia', 'travel insurance']
+        # Look for travel merchant patterns
+        travel_mask = contains(cols.desc_lower, self._travel_re) | (cols.category == 'Travel')
+        
+        if not travel_mask.any():
+            return events
+        
+        # Group nearby travel transactions
+        travel_idx = np.flatnonzero(travel_mask)
+        travel_idx = travel_idx[np.argsort(cols.date[travel_idx])]
+        dates = cols.date[travel_idx]
+        amounts = cols.amount[travel_idx]
+        merchants = cols.merchant[travel_idx]
         
         # Look for foreign transactions (check if location column exists and has data)
-        has_location = 'location' in df.columns
+        locations = None
+        if cols.location is not None:
+            locations = cols.location[travel_idx]
         
-        # Look for travel merchant patterns
-        travel_txns = df[
-            df['description'].str.lower().str.contains('|'.join(travel_keywords), na=False) |
-            (df['category'] == 'Travel')
-        ]
+        # Simple clustering by date proximity: a gap of more than 30 days starts a new trip
+        gap_days = np.diff(dates) // np.timedelta64(1, 'D')
+        trip_starts = np.flatnonzero(np.r_[True, gap_days > 30])
+        trip_ends = np.r_[trip_starts[1:], len(dates)]
+        trip_totals = np.add.reduceat(amounts, trip_starts)
         
-        # Group nearby travel transactions
-        if len(travel_txns) > 0:
-            travel_txns = travel_txns.sort_values('date')
+        # Create events for each trip
+        for start, end, total in zip(trip_starts, trip_ends, trip_totals):
+            total_spent = abs(total)
+            start_date = to_timestamp(cols, dates[start])
+            end_date = to_timestamp(cols, dates[end - 1])
             
-            # Simple clustering by date proximity
-            trips = []
-            current_trip = []
+            # Check for foreign location (first known location of the trip)
+            destination = None
+            if locations is not None:
+                known_locations = [loc for loc in locations[start:end] if pd.notna(loc)]
+                if known_locations:
+                    destination = known_locations[0]
             
-            for idx, txn in travel_txns.iterrows():
-                if not current_trip:
-                    current_trip.append(txn)
-                else:
-                    last_date = current_trip[-1]['date']
-                    if (txn['date'] - last_date).days <= 30:
-                        current_trip.append(txn)
-                    else:
-                        if len(current_trip) >= 1:
-                            trips.append(current_trip)
-                        current_trip = [txn]
+            confidence = 0.7
+            if destination:
+                confidence += 0.2
+            if total_spent > 500:
+                confidence += 0.1
             
-            if current_trip:
-                trips.append(current_trip)
+            # Extract merchant names for better context
+            trip_merchants = pd.unique(merchants[start:end]).tolist()
             
-            # Create events for each trip
-            for trip in trips:
-                trip_df = pd.DataFrame(trip)
-                total_spent = abs(trip_df['amount'].sum())
-                start_date = trip_df['date'].min()
-                end_date = trip_df['date'].max()
-                
-                # Check for foreign location
-                destination = None
-                if 'location' in trip_df.columns:
-                    locations = trip_df['location'].dropna()
-                    if len(locations) > 0:
-                        destination = locations.iloc[0]
-                
-                confidence = 0.7
-                if destination:
-                    confidence += 0.2
-                if total_spent > 500:
-                    confidence += 0.1
-                
-                # Extract merchant names for better context
-                merchants = trip_df['merchant'].unique().tolist() if 'merchant' in trip_df.columns else []
-                
-                # Create descriptive message
-                if destination:
-                    message = f'Travel to {destination}: {start_date.strftime("%Y-%m-%d")} - {end_date.strftime("%Y-%m-%d")}'
-                else:
-                    message = f'Travel detected: {start_date.strftime("%Y-%m-%d")} - {end_date.strftime("%Y-%m-%d")}'
-                
-                events.append({
-                    'event_type': 'travel',
-                    'date': start_date,
-                    'confidence': min(confidence, 0.95),
-                    'details': {
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'duration_days': (end_date - start_date).days,
-                        'total_spent': round(total_spent, 2),
-                        'num_transactions': len(trip),
-                        'destination': destination,
-                        'merchants': merchants[:3] if len(merchants) > 0 else None  # Top 3 merchants
-                    },
-                    'message': message
-                })
-        
+            # Create descriptive message
+            if destination:
+                message = f'Travel to {destination}: {start_date.strftime("%Y-%m-%d")} - {end_date.strftime("%Y-%m-%d")}'
+            else:
+                message = f'Travel detected: {start_date.strftime("%Y-%m-%d")} - {end_date.strftime("%Y-%m-%d")}'
+            
+            events.append({
+                'event_type': 'travel',
+                'date': start_date,
+                'confidence': min(confidence, 0.95),
+                'details': {
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'duration_days': (end_date - start_date).days,
+                    'total_spent': round(total_spent, 2),
+                    'num_transactions': end - start,
+                    'destination': destination,
+                    'merchants': trip_merchants[:3] if len(trip_merchants) > 0 else None  # Top 3 merchants
+                },
+                'message': message
+            })
+    
         return events
     
     def analyze(self, transactions_df):
@@ -209,20 +210,21 @@ class LifeEventDetector:
         Analyze transactions for all life events.
         
         Args:
-            transactions_df: DataFrame with transaction data
+            transactions_df: DataFrame with transaction data, or TransactionColumns
+                from to_columns() to share one conversion between detectors
             
         Returns:
             List of detected events
         """
-        df = transactions_df.copy()
-        df['date'] = pd.to_datetime(df['date'])
+        # Pull every column out once; detectors work on the NumPy arrays
+        cols = to_columns(transactions_df)
         
         all_events = []
         
         # Detect each type of life event
-        all_events.extend(self.detect_job_change(df))
-        all_events.extend(self.detect_relocation(df))
-        all_events.extend(self.detect_travel(df))
+        all_events.extend(self.detect_job_change(cols))
+        all_events.extend(self.detect_relocation(cols))
+        all_events.extend(self.detect_travel(cols))
         
         # Sort by date
         all_events.sort(key=lambda x: x['date'])
@@ -235,23 +237,24 @@ class LifeEventDetector:
         if not self.events:
             return "No life events detected."
         
-        summary = f"\n{'='*60}\nLIFE EVENT DETECTION SUMMARY\n{'='*60}\n"
-        summary += f"Total events detected: {len(self.events)}\n\n"
+        parts = ["", "=" * 60, "LIFE EVENT DETECTION SUMMARY", "=" * 60]
+        parts.extend([f"Total events detected: {len(self.events)}", ""])
         
         for i, event in enumerate(self.events, 1):
-            summary += f"{i}. {event['event_type'].upper().replace('_', ' ')}\n"
-            summary += f"   Date: {event['date'].strftime('%Y-%m-%d')}\n"
-            summary += f"   Confidence: {event['confidence']*100:.1f}%\n"
-            summary += f"   {event['message']}\n"
+            parts.append(f"{i}. {event['event_type'].upper().replace('_', ' ')}")
+            parts.append(f"   Date: {event['date'].strftime('%Y-%m-%d')}")
+            parts.append(f"   Confidence: {event['confidence']*100:.1f}%")
+            parts.append(f"   {event['message']}")
             
             if event['details']:
-                summary += "   Details:\n"
-                for key, value in event['details'].items():
-                    if value is not None:
-                        summary += f"   - {key.replace('_', ' ').title()}: {value}\n"
-            summary += "\n"
+                parts.append("   Details:")
+                parts.extend(
+                    f"   - {key.replace('_', ' ').title()}: {value}"
+                    for key, value in event['details'].items() if value is not None
+                )
+            parts.append("")
         
-        return summary
+        return "\n".join(parts) + "\n"
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ Demonstrates life-event detection and financial stress detection
 from transaction_generator import TransactionGenerator
 from life_event_detector import LifeEventDetector
 from financial_stress_detector import FinancialStressDetector
+from transaction_columns import to_columns
 import pandas as pd
 
 
@@ -37,12 +38,15 @@ def main():
     print(transactions_df.head(10).to_string(index=False))
     print(f"\n... and {len(transactions_df) - 10} more transactions")
 
+    # Convert to columnar arrays once; both detectors share the result
+    transaction_columns = to_columns(transactions_df)
+
     # LIFE EVENT DETECTION
     print_header("LIFE EVENT DETECTION")
     print("Analyzing transaction patterns for major life changes...\n")
     
     life_detector = LifeEventDetector(sensitivity='medium')
-    life_events = life_detector.analyze(transactions_df)
+    life_events = life_detector.analyze(transaction_columns)
     
     print(life_detector.get_summary())
 
@@ -51,7 +55,7 @@ def main():
     print("Checking for financial stress indicators...\n")
     
     stress_detector = FinancialStressDetector(sensitivity='medium')
-    stress_indicators = stress_detector.analyze(transactions_df)
+    stress_indicators = stress_detector.analyze(transaction_columns)
     
     print(stress_detector.get_summary())
     
@@ -76,8 +80,8 @@ def main():
     
     # Save detailed report
     print("Saving detailed transaction report...")
-    transactions_df.to_csv('transaction_report.csv', index=False)
-    print("Report saved to: transaction_report.csv\n") 
+    transactions_df.to_parquet('transaction_report.parquet', compression='zstd', engine='pyarrow')
+    print("Report saved to: transaction_report.parquet\n") 
     print(f"\n{'='*70}")
     print("Prototype complete!")
     print(f"{'='*70}\n")
@@ -3,12 +3,22 @@ Unit tests for the Financial Insights Prototype.
 Tests both the Life Event Detector and Financial Stress Detector.
 """
 
+import re
 import unittest
 import pandas as pd
+import pytest
 from datetime import datetime, timedelta
 from transaction_generator import TransactionGenerator
 from life_event_detector import LifeEventDetector
-from financial_stress_detector import FinancialStressDetector
+from financial_stress_detector import FinancialStressDetector, materialize_fee_list
+from transaction_columns import to_columns
+
+# Description patterns for the injection tests, compiled once
+NEW_EMPLOYER_RE = re.compile(r'InnovateCo|TechStart|FutureWorks|NextGen')
+MOVING_RE = re.compile(r'Mover|Move|Relocation')
+TRAVEL_RE = re.compile(r'Airline|Airways|Hotel')
+STRESS_FEE_RE = re.compile(r'Late Payment|Overdraft')
+ATM_RE = re.compile(r'ATM')
 
 
 class TestTransactionGenerator(unittest.TestCase):
@@ -27,6 +37,58 @@ class TestTransactionGenerator(unittest.TestCase):
         self.assertGreater(len(df), 0)
         print(f"Generator created {len(df)} transactions")
     
+    def test_empty_dataset(self):
+        """Test that a dataset with nothing included is empty but keeps its columns."""
+        df = TransactionGenerator(seed=123).generate_dataset(
+            include_life_events=False,
+            include_stress=False,
+            include_normal=False
+        )
+        
+        self.assertEqual(len(df), 0)
+        self.assertEqual(
+            list(df.columns),
+            ['transaction_id', 'date', 'description', 'amount', 'category', 'merchant', 'type']
+        )
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['date']))
+        self.assertEqual(LifeEventDetector().analyze(df), [])
+        self.assertEqual(FinancialStressDetector().analyze(df), [])
+        
+        print("Empty dataset generated")
+    
+    def test_seeded_output_independent_of_cache(self):
+        """Test that a seeded generator repeats itself whatever was cached before."""
+        start = datetime(2024, 1, 1)
+        
+        def run():
+            generator = TransactionGenerator(seed=42)
+            df = generator.generate_dataset(num_days=30)
+            return df, generator.get_life_event_rows(start)
+        
+        first_df, first_rows = run()
+        second_df, second_rows = run()
+        
+        # Each call is dated to end at its own datetime.now()
+        pd.testing.assert_frame_equal(first_df.drop(columns='date'), second_df.drop(columns='date'))
+        self.assertTrue((second_df['date'] >= first_df['date']).all())
+        self.assertEqual(first_rows, second_rows)
+        
+        print("Seeded output repeats across generators")
+    
+    def test_seeded_dataset_uses_subclass(self):
+        """Test that a seeded subclass builds its dataset with its own methods."""
+        class NoStressGenerator(TransactionGenerator):
+            def _financial_stress_block(self, rng):
+                return self._life_event_block(rng).iloc[:0]
+        
+        df = NoStressGenerator(seed=42).generate_dataset(include_normal=False)
+        base_df = TransactionGenerator(seed=42).generate_dataset(include_normal=False)
+        
+        self.assertEqual(FinancialStressDetector().analyze(df), [])
+        self.assertLess(len(df), len(base_df))
+        
+        print("Seeded subclass dataset built by the subclass")
+    
     def test_transaction_columns(self):
         """Test that transactions have required columns."""
         generator = TransactionGenerator(seed=123)
@@ -43,31 +105,23 @@ class TestTransactionGenerator(unittest.TestCase):
     def test_life_events_injection(self):
         """Test that life events are injected."""
         generator = TransactionGenerator(seed=123)
-        df = generator.generate_dataset(
-            include_life_events=True,
-            include_stress=False,
-            num_days=90
-        )
+        rows = generator.get_life_event_rows(datetime.now() - timedelta(days=90))
+        descriptions = {row['description'] for row in rows}
         
         # Should have job change, relocation, and travel indicators
         # Check for any new company (InnovateCo, TechStart, FutureWorks, NextGen, etc.)
-        has_new_employer = any(
-            any(company in str(desc) for company in ['InnovateCo', 'TechStart', 'FutureWorks', 'NextGen'])
-            for desc in df['description']
-        )
+        has_new_employer = any(map(NEW_EMPLOYER_RE.search, descriptions))
         self.assertTrue(has_new_employer, "No new employer found in transactions")
         
         # Check for moving company
-        has_moving = any('Mover' in str(desc) or 'Move' in str(desc) or 'Relocation' in str(desc) 
-                        for desc in df['description'])
+        has_moving = any(map(MOVING_RE.search, descriptions))
         self.assertTrue(has_moving, "No moving company found in transactions")
         
         # Check for travel - look for airlines, airways, or travel category
-        has_travel = any('Airline' in str(desc) or 'Airways' in str(desc) or 'Hotel' in str(desc) 
-                        for desc in df['description'])
+        has_travel = any(map(TRAVEL_RE.search, descriptions))
         if not has_travel:
             # Also check if Travel category exists
-            has_travel = 'Travel' in df['category'].values
+            has_travel = any(row['category'] == 'Travel' for row in rows)
         
         self.assertTrue(has_travel, "No travel indicators found in transactions")
         
@@ -76,16 +130,12 @@ class TestTransactionGenerator(unittest.TestCase):
     def test_stress_indicators_injection(self):
         """Test that financial stress indicators are injected."""
         generator = TransactionGenerator(seed=123)
-        df = generator.generate_dataset(
-            include_life_events=False,
-            include_stress=True,
-            num_days=90
-        )
+        rows = generator.get_financial_stress_rows(datetime.now() - timedelta(days=90))
+        descriptions = [row['description'] for row in rows]
         
         # Should have late fees, ATM withdrawals, and payday loan
-        self.assertTrue(any('Late Payment' in str(desc) or 'Overdraft' in str(desc) 
-                          for desc in df['description']))
-        atm_count = sum('ATM' in str(desc) for desc in df['description'])
+        self.assertTrue(any(map(STRESS_FEE_RE.search, descriptions)))
+        atm_count = sum(ATM_RE.search(desc) is not None for desc in descriptions)
         self.assertGreater(atm_count, 5)
         
         print(f"Financial stress indicators injected (found {atm_count} ATM withdrawals)")
@@ -94,75 +144,98 @@ class TestTransactionGenerator(unittest.TestCase):
 class TestLifeEventDetector(unittest.TestCase):
     """Test the Life Event Detector."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.generator = TransactionGenerator(seed=456)
-        self.detector = LifeEventDetector(sensitivity='medium')
-    
-    def test_job_change_detection(self):
-        """Test detection of job changes."""
-        df = self.generator.generate_dataset(
+    @classmethod
+    def setUpClass(cls):
+        """Generate the life-event dataset and analyze it once for the class."""
+        cls.df = TransactionGenerator(seed=456).generate_dataset(
             include_life_events=True,
             include_stress=False,
-            num_days=90
+            num_days=80,
+            include_normal=False
         )
+        cls.detector = LifeEventDetector(sensitivity='medium')
+        cls.events = cls.detector.analyze(cls.df)
+        # First (earliest) event of each type, whole rows keyed by type
+        cls.first_events = (
+            pd.DataFrame(cls.events).drop_duplicates('event_type').set_index('event_type')
+        )
+    
+    def test_job_change_detection(self):
+        """Test detection of job changes."""
+        self.assertIn('job_change', self.first_events.index)
+        job_change = self.first_events.loc['job_change']
+        self.assertIn('new_employer', job_change['details'])
+        self.assertGreater(job_change['confidence'], 0.7)
         
-        events = self.detector.analyze(df)
-        job_changes = [e for e in events if e['event_type'] == 'job_change']
-        
-        self.assertGreater(len(job_changes), 0)
-        self.assertIn('new_employer', job_changes[0]['details'])
-        self.assertGreater(job_changes[0]['confidence'], 0.7)
-        
-        print(f"Job change detected: {job_changes[0]['details']['new_employer']}")
-        print(f"Confidence: {job_changes[0]['confidence']*100:.1f}%")
+        print(f"Job change detected: {job_change['details']['new_employer']}")
+        print(f"Confidence: {job_change['confidence']*100:.1f}%")
     
     def test_relocation_detection(self):
         """Test detection of relocations."""
-        df = self.generator.generate_dataset(
-            include_life_events=True,
-            include_stress=False,
-            num_days=90
-        )
-        
-        events = self.detector.analyze(df)
-        relocations = [e for e in events if e['event_type'] == 'relocation']
-        
-        self.assertGreater(len(relocations), 0)
-        self.assertGreater(relocations[0]['confidence'], 0.6)
+        self.assertIn('relocation', self.first_events.index)
+        relocation = self.first_events.loc['relocation']
+        self.assertGreater(relocation['confidence'], 0.6)
         
         print(f"Relocation detected")
-        print(f"Confidence: {relocations[0]['confidence']*100:.1f}%")
-        print(f"Details: {relocations[0]['details']}")
+        print(f"Confidence: {relocation['confidence']*100:.1f}%")
+        print(f"Details: {relocation['details']}")
     
     def test_travel_detection(self):
         """Test detection of travel."""
-        df = self.generator.generate_dataset(
-            include_life_events=True,
-            include_stress=False,
-            num_days=90
-        )
-        
-        events = self.detector.analyze(df)
-        travel = [e for e in events if e['event_type'] == 'travel']
-        
-        self.assertGreater(len(travel), 0)
-        self.assertGreater(travel[0]['confidence'], 0.6)
-        self.assertIn('total_spent', travel[0]['details'])
+        self.assertIn('travel', self.first_events.index)
+        travel = self.first_events.loc['travel']
+        self.assertGreater(travel['confidence'], 0.6)
+        self.assertIn('total_spent', travel['details'])
         
         print(f"Travel detected")
-        print(f"Duration: {travel[0]['details']['duration_days']} days")
-        print(f"Total spent: ${travel[0]['details']['total_spent']:.2f}")
+        print(f"Duration: {travel['details']['duration_days']} days")
+        print(f"Total spent: ${travel['details']['total_spent']:.2f}")
+    
+    def test_relocation_from_moving_category(self):
+        """Test that a 'Moving' purchase is a relocation even without a moving keyword."""
+        df = pd.DataFrame({
+            'date': [datetime(2024, 3, 1)],
+            'description': ['Quick Move Services'],
+            'amount': [-480.0],
+            'category': ['Moving'],
+            'merchant': ['Quick Move Services'],
+            'type': 'purchase'
+        })
+        
+        events = LifeEventDetector(sensitivity='medium').analyze(df)
+        
+        self.assertEqual([e['event_type'] for e in events], ['relocation'])
+        self.assertEqual(events[0]['details']['moving_company'], 'Quick Move Services')
+        
+        print(f"Relocation detected from category: {events[0]['message']}")
+    
+    def test_non_string_descriptions(self):
+        """Test that missing or non-string descriptions match no keywords."""
+        df = pd.DataFrame({
+            'date': [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)],
+            'description': [12345, None, 'Swift Movers LLC'],
+            'amount': [-20.0, -30.0, -450.0],
+            'category': ['Shopping', 'Shopping', 'Services'],
+            'merchant': ['Shop', 'Shop', 'Swift Movers LLC'],
+            'type': 'purchase'
+        })
+        
+        events = LifeEventDetector(sensitivity='medium').analyze(df)
+        
+        self.assertEqual([e['event_type'] for e in events], ['relocation'])
+        self.assertEqual(events[0]['details']['moving_company'], 'Swift Movers LLC')
+        
+        print("Non-string descriptions handled")
     
     def test_no_false_positives_on_normal_data(self):
         """Test that detector doesn't flag normal transactions."""
-        df = self.generator.generate_dataset(
+        df = TransactionGenerator(seed=456).generate_dataset(
             include_life_events=False,
             include_stress=False,
             num_days=90
         )
         
-        events = self.detector.analyze(df)
+        events = LifeEventDetector(sensitivity='medium').analyze(df)
         
         # Should detect very few or no events in normal data
         self.assertLessEqual(len(events), 1)  # Allow for occasional false positive
@@ -173,113 +246,146 @@ class TestLifeEventDetector(unittest.TestCase):
 class TestFinancialStressDetector(unittest.TestCase):
     """Test the Financial Stress Detector."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.generator = TransactionGenerator(seed=789)
-        self.detector = FinancialStressDetector(sensitivity='medium')
-    
-    def test_late_payment_detection(self):
-        """Test detection of late payment fees."""
-        df = self.generator.generate_dataset(
+    @classmethod
+    def setUpClass(cls):
+        """Generate the stress dataset and analyze it once for the class."""
+        cls.df = TransactionGenerator(seed=789).generate_dataset(
             include_life_events=False,
             include_stress=True,
-            num_days=90
+            num_days=80,
+            include_normal=False
         )
+        cls.detector = FinancialStressDetector(sensitivity='medium')
+        cls.indicators = cls.detector.analyze(cls.df)
+        cls.risk_score = cls.detector.get_risk_score()
+        # First indicator of each type, whole rows keyed by type
+        cls.first_indicators = (
+            pd.DataFrame(cls.indicators).drop_duplicates('indicator_type').set_index('indicator_type')
+        )
+    
+    def test_late_payment_detection(self):
+        """Test detection of late payment fees."""
+        self.assertIn('late_payment_fees', self.first_indicators.index)
+        late_fees = self.first_indicators.loc['late_payment_fees']
+        self.assertIn('total_fees', late_fees['details'])
+        self.assertGreater(late_fees['details']['total_fees'], 0)
         
-        indicators = self.detector.analyze(df)
-        late_fees = [i for i in indicators if i['indicator_type'] == 'late_payment_fees']
+        print(f"Late payment fees detected")
+        print(f"Total fees: ${late_fees['details']['total_fees']:.2f}")
+        print(f"Severity: {late_fees['severity']}")
+    
+    def test_fee_list_materialization(self):
+        """Test that fee records can be built from the indicator arrays."""
+        details = self.first_indicators.loc['late_payment_fees', 'details']
+        fee_list = materialize_fee_list(details['fee_list_arrays'])
         
-        self.assertGreater(len(late_fees), 0)
-        self.assertIn('total_fees', late_fees[0]['details'])
-        self.assertGreater(late_fees[0]['details']['total_fees'], 0)
+        self.assertEqual(len(fee_list), details['num_fees'])
+        self.assertIsInstance(fee_list[0]['date'], pd.Timestamp)
+        self.assertEqual(set(fee_list[0]), {'date', 'description', 'amount'})
         
-        print(f"Late payment fees detected")
-        print(f"Total fees: ${late_fees[0]['details']['total_fees']:.2f}")
-        print(f"Severity: {late_fees[0]['severity']}")
+        print(f"Fee list materialized: {len(fee_list)} fee(s)")
     
     def test_frequent_withdrawals_detection(self):
         """Test detection of frequent small withdrawals."""
-        df = self.generator.generate_dataset(
-            include_life_events=False,
-            include_stress=True,
-            num_days=90
-        )
-        
-        indicators = self.detector.analyze(df)
-        withdrawals = [i for i in indicators 
-                      if i['indicator_type'] == 'frequent_small_withdrawals']
-        
-        self.assertGreater(len(withdrawals), 0)
-        self.assertGreater(withdrawals[0]['details']['num_withdrawals'], 5)
+        self.assertIn('frequent_small_withdrawals', self.first_indicators.index)
+        details = self.first_indicators.loc['frequent_small_withdrawals', 'details']
+        self.assertGreater(details['num_withdrawals'], 5)
         
         print(f"Frequent small withdrawals detected")
-        print(f"Number of withdrawals: {withdrawals[0]['details']['num_withdrawals']}")
-        print(f"Total amount: ${withdrawals[0]['details']['total_amount']:.2f}")
+        print(f"Number of withdrawals: {details['num_withdrawals']}")
+        print(f"Total amount: ${details['total_amount']:.2f}")
+    
+    def test_withdrawal_window_includes_end_day(self):
+        """Test that the withdrawal window counts both of its end days."""
+        start = datetime(2024, 1, 1)
+        days = [0, 10, 11, 12, 13, 14]
+        df = pd.DataFrame({
+            'date': [start + timedelta(days=d) for d in days],
+            'description': [f'ATM Withdrawal #{1000 + d}' for d in days],
+            'amount': [-40.0] * len(days),
+            'category': 'ATM',
+            'merchant': 'ATM',
+            'type': 'withdrawal'
+        })
+        
+        indicators = pd.DataFrame(FinancialStressDetector(sensitivity='medium').analyze(df))
+        withdrawals = indicators.query("indicator_type == 'frequent_small_withdrawals'")
+        
+        self.assertEqual(len(withdrawals), 1)
+        withdrawal = withdrawals.iloc[0]
+        self.assertEqual(withdrawal['details']['num_withdrawals'], 6)
+        self.assertEqual(withdrawal['details']['total_amount'], 240.0)
+        self.assertEqual(withdrawal['date_range'][0], pd.Timestamp(start))
+        
+        print(f"Window from {withdrawal['date_range'][0].date()} counted {len(days)} withdrawals")
+    
+    def test_timezone_aware_dates(self):
+        """Test that indicator dates keep the timezone of the input dates."""
+        df = self.df.assign(date=self.df['date'].dt.tz_localize('America/New_York'))
+        indicators = FinancialStressDetector(sensitivity='medium').analyze(df)
+        
+        self.assertEqual(
+            [i['indicator_type'] for i in indicators],
+            [i['indicator_type'] for i in self.indicators]
+        )
+        for aware, naive in zip(indicators, self.indicators):
+            self.assertEqual(
+                [d.tz_localize(None) for d in aware['date_range']],
+                list(naive['date_range'])
+            )
+        self.assertEqual(str(indicators[0]['date_range'][0].tz), 'America/New_York')
+        
+        print(f"Timezone kept: {indicators[0]['date_range'][0].tz}")
     
     def test_payday_loan_detection(self):
         """Test detection of payday loans."""
-        df = self.generator.generate_dataset(
-            include_life_events=False,
-            include_stress=True,
-            num_days=90
-        )
-        
-        indicators = self.detector.analyze(df)
-        loans = [i for i in indicators if i['indicator_type'] == 'payday_loan']
-        
-        self.assertGreater(len(loans), 0)
-        self.assertEqual(loans[0]['severity'], 'high')
+        self.assertIn('payday_loan', self.first_indicators.index)
+        loan = self.first_indicators.loc['payday_loan']
+        self.assertEqual(loan['severity'], 'high')
         
         print(f"Payday loan detected")
-        print(f"Amount: ${abs(loans[0]['details']['amount']):.2f}")
-        print(f"Severity: {loans[0]['severity']}")
+        print(f"Amount: ${abs(loan['details']['amount']):.2f}")
+        print(f"Severity: {loan['severity']}")
     
     def test_declining_balance_detection(self):
         """Test detection of declining balance."""
-        df = self.generator.generate_dataset(
+        # The balance trend needs the full history, not just the injected rows
+        df = TransactionGenerator(seed=789).generate_dataset(
             include_life_events=False,
             include_stress=True,
             num_days=90
         )
-        
-        indicators = self.detector.analyze(df)
-        declining = [i for i in indicators if i['indicator_type'] == 'declining_balance']
+        indicators = pd.DataFrame(FinancialStressDetector(sensitivity='medium').analyze(df))
+        declining = indicators.query("indicator_type == 'declining_balance'")
         
         # Declining balance might not always be detected depending on data
         if len(declining) > 0:
-            self.assertIn('decline_percentage', declining[0]['details'])
+            details = declining.iloc[0]['details']
+            self.assertIn('decline_percentage', details)
             print(f"Declining balance detected")
-            print(f"Decline: {declining[0]['details']['decline_percentage']:.1f}%")
+            print(f"Decline: {details['decline_percentage']:.1f}%")
         else:
             print("No declining balance detected (data may not trigger threshold)")
     
     def test_risk_score_calculation(self):
         """Test that risk score is calculated correctly."""
-        df = self.generator.generate_dataset(
-            include_life_events=False,
-            include_stress=True,
-            num_days=90
-        )
-        
-        self.detector.analyze(df)
-        risk_score = self.detector.get_risk_score()
+        self.assertGreaterEqual(self.risk_score, 0)
+        self.assertLessEqual(self.risk_score, 100)
+        self.assertGreater(self.risk_score, 30)  # Should have some risk with stress data
         
-        self.assertGreaterEqual(risk_score, 0)
-        self.assertLessEqual(risk_score, 100)
-        self.assertGreater(risk_score, 30)  # Should have some risk with stress data
-        
-        print(f"Risk score calculated: {risk_score}/100")
+        print(f"Risk score calculated: {self.risk_score}/100")
     
     def test_healthy_financial_data(self):
         """Test that detector shows low risk for healthy finances."""
-        df = self.generator.generate_dataset(
+        df = TransactionGenerator(seed=789).generate_dataset(
             include_life_events=False,
             include_stress=False,
             num_days=90
         )
         
-        self.detector.analyze(df)
-        risk_score = self.detector.get_risk_score()
+        detector = FinancialStressDetector(sensitivity='medium')
+        detector.analyze(df)
+        risk_score = detector.get_risk_score()
         
         # Healthy data should have low or zero risk
         self.assertLess(risk_score, 30)
@@ -287,48 +393,73 @@ class TestFinancialStressDetector(unittest.TestCase):
         print(f"Healthy data check: Risk score = {risk_score}/100 (good!)")
 
 
-class TestIntegration(unittest.TestCase):
-    """Integration tests for the complete system."""
+# Integration tests share one combined dataset (and its analysis) per session
+
+@pytest.fixture(scope='session')
+def combined_df():
+    """Dataset with both life events and financial stress."""
+    return TransactionGenerator(seed=999).generate_dataset(
+        include_life_events=True,
+        include_stress=True,
+        num_days=90
+    )
+
+
+@pytest.fixture(scope='session')
+def life_events(combined_df):
+    """Life events detected in the combined dataset."""
+    return LifeEventDetector().analyze(combined_df)
+
+
+@pytest.fixture(scope='session')
+def stress_detector(combined_df):
+    """Stress detector that has analyzed the combined dataset."""
+    detector = FinancialStressDetector()
+    detector.analyze(combined_df)
+    return detector
+
+
+def test_complete_analysis_workflow(combined_df, life_events, stress_detector):
+    """Test the complete analysis workflow."""
+    print("\n" + "="*60)
+    print("INTEGRATION TEST: Complete Analysis Workflow")
+    print("="*60)
     
-    def test_complete_analysis_workflow(self):
-        """Test the complete analysis workflow."""
-        print("\n" + "="*60)
-        print("INTEGRATION TEST: Complete Analysis Workflow")
-        print("="*60)
-        
-        # Generate data
-        generator = TransactionGenerator(seed=999)
-        df = generator.generate_dataset(
-            include_life_events=True,
-            include_stress=True,
-            num_days=90
-        )
-        
-        print(f"\n1. Generated {len(df)} transactions")
-        
-        # Run life event detection
-        life_detector = LifeEventDetector()
-        life_events = life_detector.analyze(df)
-        
-        print(f"2. Detected {len(life_events)} life events:")
-        for event in life_events:
-            print(f"   - {event['event_type']}: {event['confidence']*100:.1f}% confidence")
-        
-        # Run financial stress detection
-        stress_detector = FinancialStressDetector()
-        stress_indicators = stress_detector.analyze(df)
-        risk_score = stress_detector.get_risk_score()
-        
-        print(f"3. Detected {len(stress_indicators)} stress indicators")
-        print(f"4. Risk Score: {risk_score}/100")
-        
-        # Verify results
-        self.assertGreater(len(life_events), 0)
-        self.assertGreater(len(stress_indicators), 0)
-        self.assertGreater(risk_score, 0)
-        
-        print("\nINTEGRATION TEST PASSED")
-        print("="*60 + "\n")
+    print(f"\n1. Generated {len(combined_df)} transactions")
+    
+    print(f"2. Detected {len(life_events)} life events:")
+    for event in life_events:
+        print(f"   - {event['event_type']}: {event['confidence']*100:.1f}% confidence")
+    
+    stress_indicators = stress_detector.stress_indicators
+    risk_score = stress_detector.get_risk_score()
+    
+    print(f"3. Detected {len(stress_indicators)} stress indicators")
+    print(f"4. Risk Score: {risk_score}/100")
+    
+    # Verify results
+    assert len(life_events) > 0
+    assert len(stress_indicators) > 0
+    assert risk_score > 0
+    
+    print("\nINTEGRATION TEST PASSED")
+    print("="*60 + "\n")
+
+
+def test_shared_columns_match_dataframe(combined_df, life_events, stress_detector):
+    """Test that detectors give the same results on a shared column view."""
+    cols = to_columns(combined_df)
+    
+    def without_fee_arrays(indicators):
+        # fee_list_arrays holds ndarrays, which do not compare with ==
+        return [
+            {**i, 'details': {k: v for k, v in i['details'].items() if k != 'fee_list_arrays'}}
+            for i in indicators
+        ]
+    
+    assert LifeEventDetector().analyze(cols) == life_events
+    assert (without_fee_arrays(FinancialStressDetector().analyze(cols))
+            == without_fee_arrays(stress_detector.stress_indicators))
 
 
 def run_tests():
@@ -337,37 +468,10 @@ def run_tests():
     print("  FINANCIAL INSIGHTS PROTOTYPE - TEST SUITE")
     print("="*70 + "\n")
     
-    # Create test suite
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    # Add all test classes
-    suite.addTests(loader.loadTestsFromTestCase(TestTransactionGenerator))
-    suite.addTests(loader.loadTestsFromTestCase(TestLifeEventDetector))
-    suite.addTests(loader.loadTestsFromTestCase(TestFinancialStressDetector))
-    suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
-    
-    # Run tests with verbose output
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Print summary
-    print("\n" + "="*70)
-    print("  TEST SUMMARY")
-    print("="*70)
-    print(f"Tests run: {result.testsRun}")
-    print(f"Successes: {result.testsRun - len(result.failures) - len(result.errors)}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    
-    if result.wasSuccessful():
-        print("\nALL TESTS PASSED!")
-        print("="*70 + "\n")
-        return 0
-    else:
-        print("\nSOME TESTS FAILED")
-        print("="*70 + "\n")
-        return 1
+    # Test classes are independent, so pytest-xdist spreads them across
+    # worker processes; loadscope keeps each class (and its setUpClass
+    # dataset) on a single worker
+    return int(pytest.main(['-n', 'auto', '--dist', 'loadscope', '-v', __file__]))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""
+Columnar view of transaction data shared by the detectors.
+Holds each transaction column as a NumPy array so detectors can mask and
+reduce without building intermediate DataFrames.
+"""
+
+import re
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+TransactionColumns = namedtuple(
+    'TransactionColumns',
+    'date amount amount_abs description type category merchant location desc_lower tz'
+)
+
+
+def to_columns(transactions_df):
+    """
+    Convert a transaction DataFrame into TransactionColumns.
+
+    Args:
+        transactions_df: DataFrame with transaction data. A TransactionColumns
+            is returned unchanged, so callers can convert once and reuse it.
+
+    Returns:
+        TransactionColumns of NumPy arrays (`type` and `category` are
+        Categoricals, `desc_lower` is a string Series for contains()).
+        `location` is None when the DataFrame has no location column.
+        Timezone-aware dates are stored as naive UTC with their zone in `tz`
+        (None for naive dates); to_timestamps() restores it.
+    """
+    if isinstance(transactions_df, TransactionColumns):
+        return transactions_df
+
+    descriptions = transactions_df['description']
+    amounts = transactions_df['amount'].to_numpy(dtype=np.float64)
+    dates = transactions_df['date']
+    # Only parse dates that are not already datetime64 (no copy otherwise)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    tz = dates.dt.tz
+    if tz is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    location = None
+    if 'location' in transactions_df.columns:
+        location = transactions_df['location'].to_numpy(dtype=object)
+
+    return TransactionColumns(
+        date=dates.to_numpy(dtype='datetime64[ns]'),
+        amount=amounts,
+        amount_abs=np.abs(amounts),
+        description=descriptions.to_numpy(dtype=object),
+        # Low-cardinality labels compare on their integer codes
+        type=pd.Categorical(transactions_df['type']),
+        category=pd.Categorical(transactions_df['category']),
+        merchant=transactions_df['merchant'].to_numpy(dtype=object),
+        location=location,
+        # Lowercase descriptions once; every keyword scan reuses this column.
+        # It stays a pandas Series (positional RangeIndex) so scans run on the
+        # vectorized string engine; non-string descriptions become NaN.
+        desc_lower=descriptions.str.lower().reset_index(drop=True),
+        tz=tz
+    )
+
+
+def to_timestamps(cols, dates):
+    """
+    DatetimeIndex of `dates` (taken from `cols.date`) in the original timezone.
+
+    Args:
+        cols: TransactionColumns the dates came from
+        dates: datetime64 array
+    """
+    index = pd.DatetimeIndex(dates)
+    if cols.tz is None:
+        return index
+    return index.tz_localize('UTC').tz_convert(cols.tz)
+
+
+def to_timestamp(cols, date):
+    """Single `cols.date` value as a Timestamp in the original timezone."""
+    if cols.tz is None:
+        return pd.Timestamp(date)
+    return pd.Timestamp(date).tz_localize('UTC').tz_convert(cols.tz)
+
+
+def compile_keywords(keywords):
+    """Compile a regex matching any of the (lowercase) keywords."""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+def contains(values, pattern):
+    """
+    Boolean mask of the strings in `values` that match `pattern`.
+
+    Args:
+        values: Series of strings (missing values never match)
+        pattern: compiled regex (matched by its pattern string, without
+            flags), or a plain substring
+    """
+    if isinstance(pattern, str):
+        matches = values.str.contains(pattern, regex=False, na=False)
+    else:
+        matches = values.str.contains(pattern.pattern, regex=True, na=False)
+    return matches.to_numpy(dtype=bool)
@@ -3,162 +3,195 @@ Synthetic transaction data generator for testing detectors.
 Simulates realistic banking transactions with various patterns.
 """
 
-import random
 from datetime import datetime, timedelta
+from functools import lru_cache
 from faker import Faker
+import numpy as np
 import pandas as pd
 
-fake = Faker()
+COMPANY_POOL_SIZE = 256
+DATASET_CACHE_SIZE = 16
+
+
+def _build_company_pool(seed, size=COMPANY_POOL_SIZE):
+    """Generate `size` company names with a (optionally seeded) Faker."""
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    return np.array([fake.company() for _ in range(size)], dtype=object)
+
+
+# A seed always yields the same names, so seeded generators share one pool
+_seeded_company_pool = lru_cache(maxsize=32)(_build_company_pool)
 
 
 class TransactionGenerator:
     """Generate realistic synthetic transaction data."""
     
     def __init__(self, seed=None):
-        if seed is not None:
-            random.seed(seed)
-            Faker.seed(seed)
+        self._seed = seed
+        self.rng = self._new_rng(seed)
+        self._pool = None
+    
+    def _company_pool(self, num_draws):
+        """
+        Pregenerated company names; rows index into the pool.
+        
+        Built on first use, since only normal transactions need it and the
+        Faker calls dominate generation time otherwise. Seeded generators
+        share the full pool of their seed; an unseeded pool only holds as
+        many names as the rows draw (at most COMPANY_POOL_SIZE), growing if
+        a later call draws more.
+        """
+        if self._seed is not None:
+            if self._pool is None:
+                self._pool = _seeded_company_pool(self._seed)
+        elif self._pool is None or len(self._pool) < min(num_draws, COMPANY_POOL_SIZE):
+            self._pool = _build_company_pool(None, min(num_draws, COMPANY_POOL_SIZE))
+        return self._pool
+    
+    @staticmethod
+    def _new_rng(seed):
+        """NumPy Generator on the SFC64 bit generator (cheaper per draw than PCG64)."""
+        return np.random.Generator(np.random.SFC64(seed))
+    
+    @staticmethod
+    def _with_dates(block, start_date):
+        """Replace a block's int64 day_offset column with dates counted from start_date."""
+        days = block.pop('day_offset')
+        block.insert(0, 'date', pd.Timestamp(start_date) + pd.to_timedelta(days, unit='D'))
+        return block
+    
+    @staticmethod
+    def _transaction_block(days, description, amount, category, merchant, txn_type):
+        """
+        Build a DataFrame of transactions on the given days.
+        
+        Blocks carry int64 day offsets rather than dates; _with_dates() turns
+        them into dates once the rows are final.
+        """
+        return pd.DataFrame({
+            'day_offset': np.asarray(days, dtype=np.int64),
+            'description': description,
+            'amount': amount,
+            'category': category,
+            'merchant': merchant,
+            'type': txn_type
+        })
         
     def generate_normal_transactions(self, start_date, num_days=90):
         """Generate normal day-to-day transactions."""
-        transactions = []
-        current_date = start_date
+        return self._with_dates(self._normal_block(self.rng, num_days), start_date)
+    
+    def _normal_block(self, rng, num_days):
+        """Generate the normal transactions for num_days days, by day offset."""
+        days = np.arange(num_days)
+        
+        # Regular expenses (60% of days)
+        active = rng.random(num_days) < 0.6
+        grocery_days = days[active & (rng.random(num_days) < 0.4)]
+        dining_days = days[active & (rng.random(num_days) < 0.5)]
+        utility_days = days[active & (days % 30 == 15)]
+        rent_days = days[active & (days % 30 == 1)]
+        
+        # Strings are only built per pool entry; rows just index into the pools
+        company_pool = self._company_pool(2 * (len(grocery_days) + len(dining_days)))
         
-        for day in range(num_days):
+        def companies(n, pool=company_pool):
+            return pool[rng.integers(0, len(company_pool), size=n)]
+        
+        supermarkets = company_pool + ' Supermarket'
+        cafes = company_pool + ' Cafe'
+        utilities = np.array(['Electric Company', 'Water Utility', 'Internet Provider'], dtype=object)
+        utility_names = np.tile(utilities, len(utility_days))
+        utility_payments = np.tile(utilities + ' Payment', len(utility_days))
+        
+        blocks = [
             # Salary deposit (bi-weekly)
-            if day % 14 == 0:
-                transactions.append({
-                    'date': current_date,
-                    'description': 'ACME Corp Payroll Deposit',
-                    'amount': 2500.00,
-                    'category': 'Income',
-                    'merchant': 'ACME Corp',
-                    'type': 'deposit'
-                })
-            
-            # Regular expenses (60% of days)
-            if random.random() < 0.6:
-                # Groceries
-                if random.random() < 0.4:
-                    transactions.append({
-                        'date': current_date,
-                        'description': f'{fake.company()} Supermarket',
-                        'amount': -round(random.uniform(30, 120), 2),
-                        'category': 'Groceries',
-                        'merchant': fake.company(),
-                        'type': 'purchase'
-                    })
-                
-                # Utilities (monthly)
-                if day % 30 == 15:
-                    for utility in ['Electric Company', 'Water Utility', 'Internet Provider']:
-                        transactions.append({
-                            'date': current_date,
-                            'description': f'{utility} Payment',
-                            'amount': -round(random.uniform(50, 150), 2),
-                            'category': 'Utilities',
-                            'merchant': utility,
-                            'type': 'bill_payment'
-                        })
-                
-                # Rent (monthly)
-                if day % 30 == 1:
-                    transactions.append({
-                        'date': current_date,
-                        'description': 'Rent Payment',
-                        'amount': -1200.00,
-                        'category': 'Housing',
-                        'merchant': 'Property Management',
-                        'type': 'bill_payment'
-                    })
-                
-                # Coffee/restaurants
-                if random.random() < 0.5:
-                    transactions.append({
-                        'date': current_date,
-                        'description': f'{fake.company()} Cafe',
-                        'amount': -round(random.uniform(5, 45), 2),
-                        'category': 'Dining',
-                        'merchant': fake.company(),
-                        'type': 'purchase'
-                    })
-            
-            current_date += timedelta(days=1)
-        
-        return transactions
+            self._transaction_block(
+                days[days % 14 == 0], 'ACME Corp Payroll Deposit',
+                2500.00, 'Income', 'ACME Corp', 'deposit'
+            ),
+            # Groceries
+            self._transaction_block(
+                grocery_days, companies(len(grocery_days), supermarkets),
+                -np.round(rng.uniform(30, 120, len(grocery_days)), 2),
+                'Groceries', companies(len(grocery_days)), 'purchase'
+            ),
+            # Utilities (monthly)
+            self._transaction_block(
+                np.repeat(utility_days, len(utilities)), utility_payments,
+                -np.round(rng.uniform(50, 150, len(utility_names)), 2),
+                'Utilities', utility_names, 'bill_payment'
+            ),
+            # Rent (monthly)
+            self._transaction_block(
+                rent_days, 'Rent Payment',
+                -1200.00, 'Housing', 'Property Management', 'bill_payment'
+            ),
+            # Coffee/restaurants
+            self._transaction_block(
+                dining_days, companies(len(dining_days), cafes),
+                -np.round(rng.uniform(5, 45, len(dining_days)), 2),
+                'Dining', companies(len(dining_days)), 'purchase'
+            )
+        ]
+        
+        return pd.concat(blocks, ignore_index=True)
     
     def inject_life_events(self, transactions, start_date):
         """Inject life event indicators into transactions."""
-        life_events = []
+        life_events = self._with_dates(self._life_event_block(self.rng), start_date)
+        return pd.concat([transactions, life_events], ignore_index=True)
+    
+    def get_life_event_rows(self, start_date):
+        """Return the life event transactions alone, as a list of row dicts."""
+        return self._with_dates(self._life_event_block(self.rng), start_date).to_dict('records')
+    
+    def _life_event_block(self, rng):
+        """Generate the life event transactions (job change, relocation, travel)."""
+        # Every random day and amount for the block is drawn in one call each
+        (job_change_day, new_pay_offset, move_day, moving_offset, utility_offset,
+         travel_day, flight_offset, hotel_offset, souvenir_offset) = rng.integers(
+            [40, 5, 45, 2, 1, 65, 10, 5, 1],
+            [51, 11, 56, 6, 4, 76, 21, 13, 4]
+        )
+        (old_salary, new_salary, moving_cost, deposit_amount, utility_cost,
+         flight_cost, hotel_cost, meal_cost, souvenir_cost) = np.round(rng.uniform(
+            [2200, 2800, 350, 1800, 50, 450, 600, 25, 40],
+            [2800, 3500, 650, 2600, 100, 850, 1200, 65, 120]
+        ), 2)
         
-        # Random companies and amounts for more variety
-        old_company = random.choice(['ACME Corp', 'GlobalTech Inc', 'TechCorp', 'DataSystems LLC'])
-        new_company = random.choice(['TechStart Inc', 'InnovateCo', 'FutureWorks', 'NextGen Solutions'])
-        old_salary = round(random.uniform(2200, 2800), 2)
-        new_salary = round(random.uniform(2800, 3500), 2)
+        # Random companies for more variety
+        old_company = rng.choice(['ACME Corp', 'GlobalTech Inc', 'TechCorp', 'DataSystems LLC'])
+        new_company = rng.choice(['TechStart Inc', 'InnovateCo', 'FutureWorks', 'NextGen Solutions'])
         
         # Job change (random day between 40-50)
-        job_change_day = random.randint(40, 50)
-        job_change_date = start_date + timedelta(days=job_change_day)
-        life_events.extend([
-            {
-                'date': job_change_date - timedelta(days=2),
-                'description': f'Final paycheck - {old_company}',
-                'amount': old_salary,
-                'category': 'Income',
-                'merchant': old_company,
-                'type': 'deposit'
-            },
-            {
-                'date': job_change_date + timedelta(days=random.randint(5, 10)),
-                'description': f'{new_company} Payroll Deposit',
-                'amount': new_salary,
-                'category': 'Income',
-                'merchant': new_company,
-                'type': 'deposit'
-            }
-        ])
+        job_change = self._transaction_block(
+            [job_change_day - 2, job_change_day + new_pay_offset],
+            [f'Final paycheck - {old_company}', f'{new_company} Payroll Deposit'],
+            [old_salary, new_salary], 'Income', [old_company, new_company], 'deposit'
+        )
         
         # Relocation (random day between 45-55)
-        move_day = random.randint(45, 55)
-        move_date = start_date + timedelta(days=move_day)
-        moving_company = random.choice(['Swift Movers LLC', 'Quick Move Services', 'City Movers', 'RelocationPro'])
-        apartment_name = random.choice(['New Apartments', 'Riverside Complex', 'Oak Street Residences', 'Metro Living'])
-        moving_cost = round(random.uniform(350, 650), 2)
-        deposit_amount = round(random.uniform(1800, 2600), 2)
-        
-        life_events.extend([
-            {
-                'date': move_date - timedelta(days=random.randint(2, 5)),
-                'description': moving_company,
-                'amount': -moving_cost,
-                'category': 'Moving',
-                'merchant': moving_company,
-                'type': 'purchase'
-            },
-            {
-                'date': move_date,
-                'description': f'{apartment_name} - Security Deposit',
-                'amount': -deposit_amount,
-                'category': 'Housing',
-                'merchant': apartment_name,
-                'type': 'purchase'
-            },
-            {
-                'date': move_date + timedelta(days=random.randint(1, 3)),
-                'description': f'{random.choice(["City", "Metro", "Regional"])} Electric - New Service Setup',
-                'amount': -round(random.uniform(50, 100), 2),
-                'category': 'Utilities',
-                'merchant': 'City Electric',
-                'type': 'bill_payment'
-            }
-        ])
-        
-        # Travel (random day between 65-75)
-        travel_day = random.randint(65, 75)
-        travel_date = start_date + timedelta(days=travel_day)
-        
-        # Random destinations
+        moving_company = rng.choice(['Swift Movers LLC', 'Quick Move Services', 'City Movers', 'RelocationPro'])
+        apartment_name = rng.choice(['New Apartments', 'Riverside Complex', 'Oak Street Residences', 'Metro Living'])
+        utility_region = rng.choice(['City', 'Metro', 'Regional'])
+        
+        relocation = self._transaction_block(
+            [move_day - moving_offset, move_day, move_day + utility_offset],
+            [
+                moving_company,
+                f'{apartment_name} - Security Deposit',
+                f'{utility_region} Electric - New Service Setup'
+            ],
+            [-moving_cost, -deposit_amount, -utility_cost],
+            ['Moving', 'Housing', 'Utilities'],
+            [moving_company, apartment_name, 'City Electric'],
+            ['purchase', 'purchase', 'bill_payment']
+        )
+        
+        # Travel (random day between 65-75) to a random destination
         destinations = [
             ('Barcelona, Spain', 'Cafe Barcelona', 'SkyHigh Airlines', 'Coastal Resort Hotel'),
             ('Paris, France', 'Le Bistro Paris', 'Air France', 'Paris Grand Hotel'),
@@ -167,138 +200,146 @@ class TransactionGenerator:
             ('Rome, Italy', 'Trattoria Roma', 'Italian Airways', 'Roman Empire Hotel'),
             ('Cancun, Mexico', 'Beach Bar Cancun', 'AeroMexico', 'Paradise Resort'),
         ]
+        city_location, restaurant, airline, hotel = destinations[rng.integers(len(destinations))]
         
-        destination = random.choice(destinations)
-        city_location = destination[0]
-        restaurant = destination[1]
-        airline = destination[2]
-        hotel = destination[3]
-        
-        flight_cost = round(random.uniform(450, 850), 2)
-        hotel_cost = round(random.uniform(600, 1200), 2)
-        
-        life_events.extend([
-            {
-                'date': travel_date - timedelta(days=random.randint(10, 20)),
-                'description': airline,
-                'amount': -flight_cost,
-                'category': 'Travel',
-                'merchant': airline,
-                'type': 'purchase',
-                'location': None
-            },
-            {
-                'date': travel_date - timedelta(days=random.randint(5, 12)),
-                'description': hotel,
-                'amount': -hotel_cost,
-                'category': 'Travel',
-                'merchant': hotel,
-                'type': 'purchase',
-                'location': city_location
-            },
-            {
-                'date': travel_date,
-                'description': f'Foreign Transaction - {restaurant}',
-                'amount': -round(random.uniform(25, 65), 2),
-                'category': 'Dining',
-                'merchant': restaurant,
-                'type': 'purchase',
-                'location': city_location
-            },
-            {
-                'date': travel_date + timedelta(days=random.randint(1, 3)),
-                'description': f'{restaurant.split()[0]} Souvenir Shop',
-                'amount': -round(random.uniform(40, 120), 2),
-                'category': 'Shopping',
-                'merchant': 'Local Shop',
-                'type': 'purchase',
-                'location': city_location
-            }
-        ])
-        
-        return transactions + life_events
+        travel = self._transaction_block(
+            [travel_day - flight_offset, travel_day - hotel_offset, travel_day, travel_day + souvenir_offset],
+            [
+                airline,
+                hotel,
+                f'Foreign Transaction - {restaurant}',
+                f'{restaurant.split()[0]} Souvenir Shop'
+            ],
+            [-flight_cost, -hotel_cost, -meal_cost, -souvenir_cost],
+            ['Travel', 'Travel', 'Dining', 'Shopping'],
+            [airline, hotel, restaurant, 'Local Shop'],
+            'purchase'
+        )
+        travel['location'] = [None, city_location, city_location, city_location]
+        
+        return pd.concat([job_change, relocation, travel], ignore_index=True)
     
     def inject_financial_stress(self, transactions, start_date):
         """Inject financial stress indicators into transactions."""
-        stress_indicators = []
-        
-        # Late payment fees (random timing and amounts)
-        stress_day = random.randint(55, 70)
-        stress_date = start_date + timedelta(days=stress_day)
-        bank_name = random.choice(['MegaBank', 'FirstBank', 'CityBank', 'National Trust'])
-        
-        late_fee = round(random.uniform(25, 40), 2)
-        overdraft_fee = round(random.uniform(25, 35), 2)
-        
-        stress_indicators.extend([
-            {
-                'date': stress_date,
-                'description': f'Late Payment Fee - Credit Card',
-                'amount': -late_fee,
-                'category': 'Fees',
-                'merchant': bank_name,
-                'type': 'fee'
-            },
-            {
-                'date': stress_date + timedelta(days=random.randint(3, 7)),
-                'description': 'Overdraft Fee',
-                'amount': -overdraft_fee,
-                'category': 'Fees',
-                'merchant': bank_name,
-                'type': 'fee'
-            }
-        ])
-        
-        # Multiple small ATM withdrawals (cash flow issues) - random count
-        num_withdrawals = random.randint(6, 10)
-        for i in range(num_withdrawals):
-            stress_indicators.append({
-                'date': stress_date + timedelta(days=i),
-                'description': f'ATM Withdrawal #{random.randint(1000, 9999)}',
-                'amount': -round(random.uniform(20, 60), 2),
-                'category': 'ATM',
-                'merchant': 'ATM',
-                'type': 'withdrawal'
-            })
+        stress = self._with_dates(self._financial_stress_block(self.rng), start_date)
+        return pd.concat([transactions, stress], ignore_index=True)
+    
+    def get_financial_stress_rows(self, start_date):
+        """Return the financial stress transactions alone, as a list of row dicts."""
+        return self._with_dates(self._financial_stress_block(self.rng), start_date).to_dict('records')
+    
+    def _financial_stress_block(self, rng):
+        """Generate the financial stress transactions (fees, ATM withdrawals, payday loan)."""
+        # Random timing, counts and amounts, drawn in one call each
+        stress_day, overdraft_offset, num_withdrawals, loan_offset = rng.integers(
+            [55, 3, 6, 8], [71, 8, 11, 15]
+        )
+        late_fee, overdraft_fee, loan_amount = np.round(rng.uniform([25, 25, 300], [40, 35, 600]), 2)
+        bank_name = rng.choice(['MegaBank', 'FirstBank', 'CityBank', 'National Trust'])
+        loan_company = rng.choice(['QuickCash', 'FastMoney', 'CashAdvance Plus', 'PaydayNow'])
+        
+        # Late payment fees
+        fees = self._transaction_block(
+            [stress_day, stress_day + overdraft_offset],
+            ['Late Payment Fee - Credit Card', 'Overdraft Fee'],
+            [-late_fee, -overdraft_fee], 'Fees', bank_name, 'fee'
+        )
+        
+        # Multiple small ATM withdrawals (cash flow issues) - random count, one per day
+        withdrawals = self._transaction_block(
+            stress_day + np.arange(num_withdrawals),
+            np.char.add('ATM Withdrawal #', rng.integers(1000, 10000, num_withdrawals).astype(str)),
+            -np.round(rng.uniform(20, 60, num_withdrawals), 2),
+            'ATM', 'ATM', 'withdrawal'
+        )
         
         # Payday loan indicator (random company and amount)
-        loan_company = random.choice(['QuickCash', 'FastMoney', 'CashAdvance Plus', 'PaydayNow'])
-        loan_amount = round(random.uniform(300, 600), 2)
-        
-        stress_indicators.append({
-            'date': stress_date + timedelta(days=random.randint(8, 14)),
-            'description': f'{loan_company} Advance',
-            'amount': loan_amount,
-            'category': 'Loan',
-            'merchant': loan_company,
-            'type': 'deposit'
-        })
+        loan = self._transaction_block(
+            [stress_day + loan_offset],
+            [f'{loan_company} Advance'],
+            [loan_amount], 'Loan', loan_company, 'deposit'
+        )
         
-        return transactions + stress_indicators
+        return pd.concat([fees, withdrawals, loan], ignore_index=True)
     
-    def generate_dataset(self, include_life_events=True, include_stress=True, num_days=90):
-        """Generate complete dataset with optional life events and stress indicators."""
+    def generate_dataset(self, include_life_events=True, include_stress=True, num_days=90,
+                         include_normal=True):
+        """
+        Generate complete dataset with optional life events and stress indicators.
+        
+        Set include_normal=False to get only the injected transactions, which is
+        all that event-focused tests need.
+        
+        With a seed, the rows depend only on the seed and the arguments: they
+        are built by a fresh generator of the same class (self.rng is left
+        untouched) and cached, without dates, for the last DATASET_CACHE_SIZE
+        argument sets. Every call gets its own copy, dated to end now.
+        """
         start_date = datetime.now() - timedelta(days=num_days)
+        if self._seed is None:
+            df = self._build_rows(
+                self.rng, include_life_events, include_stress, num_days, include_normal
+            )
+        else:
+            df = _seeded_rows(
+                type(self), self._seed, include_life_events, include_stress, num_days,
+                include_normal
+            ).copy()
+        
+        df = self._with_dates(df, start_date)
+        
+        # Add transaction ID
+        df.insert(0, 'transaction_id', range(1, len(df) + 1))
+        
+        return df
+    
+    def _build_rows(self, rng, include_life_events, include_stress, num_days, include_normal):
+        """
+        Build the rows described by generate_dataset(), drawing from rng.
+        
+        Rows are sorted by their day_offset column; generate_dataset() dates them.
+        """
+        blocks = []
         
         # Base transactions
-        transactions = self.generate_normal_transactions(start_date, num_days)
+        if include_normal:
+            blocks.append(self._normal_block(rng, num_days))
         
         # Add life events
         if include_life_events:
-            transactions = self.inject_life_events(transactions, start_date)
+            blocks.append(self._life_event_block(rng))
         
         # Add financial stress
         if include_stress:
-            transactions = self.inject_financial_stress(transactions, start_date)
+            blocks.append(self._financial_stress_block(rng))
         
-        # Convert to DataFrame and sort by date
-        df = pd.DataFrame(transactions)
-        df = df.sort_values('date').reset_index(drop=True)
+        # Nothing requested: an empty frame with the normal schema
+        if not blocks:
+            no_labels = np.array([], dtype=object)
+            blocks.append(self._transaction_block(
+                [], no_labels, np.array([], dtype=np.float64), no_labels, no_labels, no_labels
+            ))
         
-        # Add transaction ID
-        df.insert(0, 'transaction_id', range(1, len(df) + 1))
+        # Combine once; low-cardinality labels are stored dictionary-encoded
+        # before sorting, so the sort permutes small integer codes rather
+        # than string objects
+        df = pd.concat(blocks, ignore_index=True)
+        df = df.astype({'category': 'category', 'merchant': 'category', 'type': 'category'})
         
-        return df
+        # Sort by day; each block is made of day-ordered runs, which the
+        # stable mergesort (timsort) merges cheaply. Dates are only built
+        # once the rows are in their final order.
+        return df.sort_values('day_offset', kind='mergesort', ignore_index=True)
+
+
+@lru_cache(maxsize=DATASET_CACHE_SIZE)
+def _seeded_rows(generator_class, seed, include_life_events, include_stress, num_days,
+                 include_normal):
+    """Build the undated rows of a `generator_class` seeded with `seed`, once per argument set."""
+    generator = generator_class(seed)
+    return generator._build_rows(
+        generator.rng, include_life_events, include_stress, num_days, include_normal
+    )
 
 
 if __name__ == "__main__":